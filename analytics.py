@@ -0,0 +1,230 @@
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta, time
+from models import db, User, Feedback, ExamScore, CourseMetadata, OrgDailyStat
+
+# How many days the manager dashboard shows (and the first refresh backfills)
+ROLLUP_WINDOW_DAYS = 30
+# Today's row is still changing; re-aggregate it at most this often
+ROLLUP_TTL = timedelta(minutes=5)
+
+_table_ready = False
+
+
+def ensure_table():
+    """Creates org_daily_stats if missing. The Engine doesn't know about this table."""
+    global _table_ready
+    if not _table_ready:
+        OrgDailyStat.__table__.create(bind=db.engine, checkfirst=True)
+        _table_ready = True
+
+
+def _day_bounds(start, end):
+    return datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+
+
+def _as_date(value):
+    """func.date() yields a date on MySQL but an ISO string on SQLite."""
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _count_by_day(date_col, query, start, end):
+    """Runs `query` grouped by day of `date_col` and returns {date: row}."""
+    lo, hi = _day_bounds(start, end)
+    rows = query.filter(date_col >= lo, date_col < hi).group_by(func.date(date_col)).all()
+    return {_as_date(row[0]): row[1:] for row in rows}
+
+
+def rollup_days(org_id, start, end, only_existing=False):
+    """Re-aggregates the raw tables for one organization over [start, end] and upserts the rows.
+
+    Members, feedback and exam activity are attributed to the member's current organization,
+    so callers that change a user's organization must re-roll that user's days
+    (see user_activity_days). With only_existing=True, days without a stored row are skipped
+    and left for refresh_org_rollups to fill.
+    """
+    ensure_table()
+
+    new_members = _count_by_day(
+        User.registered_at,
+        db.session.query(func.date(User.registered_at), func.count(User.id))
+            .filter(User.organization_id == org_id),
+        start, end)
+
+    courses = _count_by_day(
+        CourseMetadata.created_at,
+        db.session.query(func.date(CourseMetadata.created_at), func.count(CourseMetadata.uid))
+            .filter(CourseMetadata.organization_id == org_id),
+        start, end)
+
+    lo, hi = _day_bounds(start, end)
+    feedback = {}
+    feedback_rows = db.session.query(func.date(Feedback.created_at), Feedback.sentiment, func.count(Feedback.id))\
+        .join(User, Feedback.user_id == User.id)\
+        .filter(User.organization_id == org_id)\
+        .filter(Feedback.created_at >= lo, Feedback.created_at < hi)\
+        .group_by(func.date(Feedback.created_at), Feedback.sentiment).all()
+    for day, sentiment, count in feedback_rows:
+        feedback.setdefault(_as_date(day), {})[sentiment] = count
+
+    exams = _count_by_day(
+        ExamScore.exam_date,
+        db.session.query(func.date(ExamScore.exam_date), func.count(ExamScore.id), func.sum(ExamScore.score))
+            .join(User, ExamScore.user_id == User.id)
+            .filter(User.organization_id == org_id),
+        start, end)
+
+    existing = OrgDailyStat.query.filter(
+        OrgDailyStat.organization_id == org_id,
+        OrgDailyStat.date >= start,
+        OrgDailyStat.date <= end
+    ).all()
+    existing_map = {row.date: row for row in existing}
+
+    now = datetime.utcnow()
+    day = start
+    while day <= end:
+        row = existing_map.get(day)
+        if row is None and only_existing:
+            day += timedelta(days=1)
+            continue
+        if row is None:
+            row = OrgDailyStat(organization_id=org_id, date=day)
+            db.session.add(row)
+
+        sentiments = feedback.get(day, {})
+        exam_count, exam_sum = exams.get(day, (0, 0))
+        row.new_members = new_members.get(day, (0,))[0]
+        row.courses_created = courses.get(day, (0,))[0]
+        row.feedback_count = sum(sentiments.values())
+        row.feedback_good = sentiments.get('Good', 0)
+        row.feedback_bad = sentiments.get('Bad', 0)
+        row.feedback_neutral = sentiments.get('Neutral', 0)
+        row.exam_count = exam_count
+        row.exam_score_sum = int(exam_sum or 0)
+        row.updated_at = now
+        day += timedelta(days=1)
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker inserted the same (org, date) rows first; its numbers are just as fresh
+        db.session.rollback()
+
+
+def refresh_org_rollups(org_id):
+    """Brings an organization's rollup up to date for the dashboard window.
+
+    Any day in the window without a row is filled, and the newest stored day
+    (which may have been rolled up part-way through) is re-aggregated along with
+    everything after it. Today's row is re-aggregated at most once per ROLLUP_TTL.
+    Older rows stay as they are unless feedback analysis or a membership change
+    re-rolls them (refresh_feedback_days, refresh_org_days).
+    """
+    ensure_table()
+    now = datetime.utcnow()
+    today = now.date()
+    window_start = today - timedelta(days=ROLLUP_WINDOW_DAYS - 1)
+
+    stored = dict(db.session.query(OrgDailyStat.date, OrgDailyStat.updated_at).filter(
+        OrgDailyStat.organization_id == org_id,
+        OrgDailyStat.date >= window_start
+    ).all())
+
+    missing = [window_start + timedelta(days=i) for i in range(ROLLUP_WINDOW_DAYS)]
+    missing = [day for day in missing if day not in stored]
+
+    if not missing:
+        if now - stored[today] < ROLLUP_TTL:
+            return
+        start = today
+    elif stored:
+        start = min(missing[0], max(stored))
+    else:
+        start = window_start
+
+    rollup_days(org_id, start, today)
+
+
+def refresh_org_days(org_ids, days):
+    """Re-rolls the stored rows of each organization between the earliest and latest of `days`."""
+    if not days:
+        return
+    for org_id in {org_id for org_id in org_ids if org_id}:
+        rollup_days(org_id, min(days), max(days), only_existing=True)
+
+
+def refresh_feedback_days(feedbacks):
+    """Re-aggregates the days of feedback whose sentiment changed after it was rolled up."""
+    user_ids = {fb.user_id for fb in feedbacks}
+    if not user_ids:
+        return
+    org_by_user = dict(db.session.query(User.id, User.organization_id).filter(User.id.in_(user_ids)).all())
+
+    days_by_org = {}
+    for fb in feedbacks:
+        org_id = org_by_user.get(fb.user_id)
+        if org_id:
+            days_by_org.setdefault(org_id, set()).add(fb.created_at.date())
+
+    for org_id, days in days_by_org.items():
+        refresh_org_days([org_id], days)
+
+
+def user_activity_days(user):
+    """Days a user contributes to a rollup: registration, feedback and exams.
+
+    Call before changing the user's organization or deleting them, then pass the
+    result to refresh_org_days for the old and new organization once the change is committed.
+    """
+    days = {user.registered_at.date()} if user.registered_at else set()
+    for date_col, user_col in ((Feedback.created_at, Feedback.user_id), (ExamScore.exam_date, ExamScore.user_id)):
+        rows = db.session.query(func.date(date_col)).filter(user_col == user.id).distinct().all()
+        days.update(_as_date(row[0]) for row in rows)
+    return days
+
+
+def org_timeseries(org_id, days=ROLLUP_WINDOW_DAYS):
+    """Reads the pre-aggregated rows for the last `days` days as chart-ready lists."""
+    days_range = [datetime.utcnow().date() - timedelta(days=i) for i in range(days)]
+    days_range.reverse()
+
+    rows = OrgDailyStat.query.filter(
+        OrgDailyStat.organization_id == org_id,
+        OrgDailyStat.date >= days_range[0]
+    ).all()
+    rows_map = {row.date: row for row in rows}
+
+    def series(attr):
+        return [getattr(rows_map[day], attr) if day in rows_map else 0 for day in days_range]
+
+    feedback_total = series('feedback_count')
+    feedback_good = series('feedback_good')
+    feedback_bad = series('feedback_bad')
+    feedback_neutral = series('feedback_neutral')
+    exam_counts = series('exam_count')
+    exam_score_sums = series('exam_score_sum')
+    # Feedback the sentiment analysis hasn't reached yet ('unknown')
+    feedback_unanalyzed = [total - good - bad - neutral for total, good, bad, neutral
+                           in zip(feedback_total, feedback_good, feedback_bad, feedback_neutral)]
+
+    return {
+        'chart_labels': [day.strftime('%m-%d') for day in days_range],
+        'new_member_counts': series('new_members'),
+        'course_created_counts': series('courses_created'),
+        'feedback_good_counts': feedback_good,
+        'feedback_bad_counts': feedback_bad,
+        'feedback_neutral_counts': feedback_neutral,
+        'feedback_unanalyzed_counts': feedback_unanalyzed,
+        'exam_counts': exam_counts,
+        # None (no point) on days without exams rather than a misleading 0
+        'exam_avg_scores': [round(total / count, 1) if count else None
+                            for total, count in zip(exam_score_sums, exam_counts)],
+        'sentiment_totals': {
+            'Total': sum(feedback_total),
+            'Good': sum(feedback_good),
+            'Bad': sum(feedback_bad),
+            'Neutral': sum(feedback_neutral),
+            'Unanalyzed': sum(feedback_unanalyzed),
+        },
+    }
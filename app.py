@@ -8,11 +8,15 @@ import os
 import requests
 from models import db, User, Organization, ActiveUser, Feedback, PromptStat, ExamScore, CourseMetadata
 from sentiment import analyzer
+from engine_client import EngineClient, EngineUnavailable
+from analytics import refresh_org_rollups, refresh_feedback_days, refresh_org_days, user_activity_days, org_timeseries
 
 app = Flask(__name__)
 # Secure secret key
 app.config["SECRET_KEY"] = os.urandom(24)
-API_BASE_URL = "http://localhost:8080"
+API_BASE_URL = os.environ.get("ENGINE_URL", "http://localhost:8080")
+# All Engine calls go through per-endpoint circuit breakers (see engine_client.py)
+engine = EngineClient(API_BASE_URL)
 
 # --- Database Configuration ---
 # Connect to the SAME database as AmbaLearn-Engine
@@ -44,8 +48,8 @@ def login():
         # Delegate login to Engine to run side-effects (Active User Tracking, Last Login)
         try:
             # Note: We use json kwarg for the ost
-            engine_resp = requests.post(
-                API_BASE_URL + "/login", 
+            engine_resp = engine.post(
+                'login', "/login", 
                 json={"email": email, "password": password},
                 # We don't need to verify SSL on localhost, though it's HTTP anyway
             )
@@ -73,6 +77,8 @@ def login():
             else:
                  flash('Invalid email or password (Engine rejected)', 'error')
 
+        except EngineUnavailable:
+            flash('Authentication server is temporarily unavailable. Please try again shortly.', 'error')
         except requests.RequestException as e:
             # Fallback or Error
             print(f"Engine connection failed: {e}")
@@ -133,9 +139,21 @@ def overview():
                            prompt_counts=prompt_counts,
                            new_user_counts=new_user_counts,
                            active_user_counts=active_user_counts,
+                           engine_state=engine.overall_state(),
+                           engine_pid=os.getpid(),
                            user=current_user)
 
 
+@app.route('/engine_status')
+@login_required
+def engine_status():
+    if current_user.role != 'admin':
+        return "Access Forbidden: Admins Only", 403
+    # Breakers are per process: under serve.py each worker reports only its own view
+    return jsonify(engine_url=API_BASE_URL, scope='worker', pid=os.getpid(),
+                   state=engine.overall_state(), endpoints=engine.status())
+
+
 @app.route('/models')
 @login_required
 def models():
@@ -172,9 +190,9 @@ def generate_course_action():
         return redirect(url_for('login'))
 
     try:
-        url = f"{API_BASE_URL}/organization/{org_id}/generate_course"
-        resp = requests.post(
-            url,
+        resp = engine.post(
+            'generate_course',
+            f"/organization/{org_id}/generate_course",
             json={"topic": topic},
             cookies=cookies  # Pass the authentication cookies
         )
@@ -189,6 +207,8 @@ def generate_course_action():
                 err_msg = resp.text
             flash(f"Failed to generate course: {err_msg}", 'error')
 
+    except EngineUnavailable:
+        flash("Course Engine is temporarily unavailable. Please try again shortly.", 'error')
     except requests.RequestException as e:
         flash(f"Connection to Engine failed: {e}", 'error')
 
@@ -213,22 +233,37 @@ def courses():
          return render_template('courses.html', courses=[], user=current_user)
 
     courses_list = []
+    engine_down = False
     
     # Fetch from Engine
     try:
         cookies = session.get('engine_cookies')
         if cookies:
-            resp = requests.get(
-                f"{API_BASE_URL}/organization/{org_id}/courses",
+            resp = engine.get(
+                'courses',
+                f"/organization/{org_id}/courses",
                 cookies=cookies
             )
             if resp.status_code == 200:
                 courses_list = resp.json()
             else:
                 print(f"Failed to fetch courses: {resp.status_code} - {resp.text}")
+                engine_down = resp.status_code >= 500
+    except requests.RequestException as e:
+        # Engine down or breaker open
+        print(f"Engine unavailable: {e}")
+        engine_down = True
     except Exception as e:
         print(f"Error fetching courses: {e}")
 
+    if engine_down:
+        # Fall back to the shared DB (titles/descriptions only, no difficulty)
+        courses_list = [
+            {"uid": c.uid, "course_title": c.title, "description": c.description, "difficulty": None}
+            for c in CourseMetadata.query.filter_by(organization_id=org_id).order_by(desc(CourseMetadata.created_at)).all()
+        ]
+        flash('Course Engine is unavailable. Showing course list from the database; editing may fail.', 'warning')
+
     return render_template('courses.html', courses=courses_list, user=current_user)
 
 @app.route('/my_organization')
@@ -242,11 +277,16 @@ def my_organization():
         return render_template('my_organization.html', org=None, user=current_user)
     
     org = Organization.query.get(current_user.organization_id)
-    # Calcluate stats
-    member_count = len(org.users)
-    course_count = 0 # Placeholder until course link is established
+    # Calcluate stats (COUNT queries instead of loading every member)
+    member_count = User.query.filter_by(organization_id=org.id).count()
+    course_count = CourseMetadata.query.filter_by(organization_id=org.id).count()
+
+    # --- Data for Charts (last 30 days, from the per-org rollup) ---
+    refresh_org_rollups(org.id)
+    stats = org_timeseries(org.id)
     
-    return render_template('my_organization.html', org=org, member_count=member_count, course_count=course_count, user=current_user)
+    return render_template('my_organization.html', org=org, member_count=member_count, course_count=course_count,
+                           user=current_user, **stats)
 
 @app.route('/my_organization/members')
 @login_required
@@ -320,9 +360,9 @@ def edit_course(course_uid):
 
         try:
             if is_new:
-                resp = requests.post(f"{API_BASE_URL}/organization/{org_id}/add_course", json=course_data, cookies=cookies)
+                resp = engine.post('add_course', f"/organization/{org_id}/add_course", json=course_data, cookies=cookies)
             else:
-                resp = requests.post(f"{API_BASE_URL}/organization/{org_id}/edit_course/{course_uid}", json=course_data, cookies=cookies)
+                resp = engine.post('edit_course', f"/organization/{org_id}/edit_course/{course_uid}", json=course_data, cookies=cookies)
             
             if resp.status_code in [200, 201]:
                 flash("Course saved successfully.", "success")
@@ -337,7 +377,7 @@ def edit_course(course_uid):
     course = None
     if not is_new:
         try:
-            resp = requests.get(f"{API_BASE_URL}/organization/{org_id}/course/{course_uid}", cookies=cookies)
+            resp = engine.get('course', f"/organization/{org_id}/course/{course_uid}", cookies=cookies)
             if resp.status_code == 200:
                 course = resp.json()
             else:
@@ -358,11 +398,18 @@ def delete_course(course_uid):
          return redirect(url_for('courses'))
 
     cookies = session.get('engine_cookies')
+    # Remember the creation day so its rollup row stops counting the course
+    course_meta = CourseMetadata.query.get(course_uid)
+    created_day = course_meta.created_at.date() if course_meta and course_meta.created_at else None
     try:
-        resp = requests.delete(f"{API_BASE_URL}/organization/{org_id}/course/{course_uid}", cookies=cookies)
+        resp = engine.delete('delete_course', f"/organization/{org_id}/course/{course_uid}", cookies=cookies)
         
         if resp.status_code == 200:
             flash("Course deleted successfully", "success")
+            if created_day:
+                # End the transaction opened by the lookup so the re-roll sees the Engine's delete
+                db.session.rollback()
+                refresh_org_days([org_id], {created_day})
         else:
             flash(f"Failed to delete course: {resp.text}", "error")
     except Exception as e:
@@ -387,11 +434,13 @@ def add_organization():
         new_org.invitation_code = generate_invitation_code()
         
         manager_id = request.form.get('manager_id')
+        moved_orgs, moved_days = [], set()
         if manager_id:
             new_org.manager_id = manager_id
             # Auto-join manager and update role
             manager_user = User.query.get(manager_id)
             if manager_user:
+                moved_orgs, moved_days = [manager_user.organization_id], user_activity_days(manager_user)
                 manager_user.organization = new_org
                 if manager_user.role != 'admin':
                     manager_user.role = 'manager'
@@ -410,6 +459,8 @@ def add_organization():
         # Setting manager_user.organization = new_org works before commit.
         
         db.session.commit()
+        # Manager's history leaves their old org (the new org has no rollup rows yet)
+        refresh_org_days(moved_orgs, moved_days)
     return redirect(url_for('organizations'))
 
 def generate_invitation_code(length=6):
@@ -436,6 +487,7 @@ def edit_organization(org_id):
         org.description = request.form.get('description')
         
         manager_id = request.form.get('manager_id')
+        moved_orgs, moved_days = [], set()
         
         # Check if manager changed
         if manager_id != org.manager_id:
@@ -450,6 +502,8 @@ def edit_organization(org_id):
                  org.manager_id = manager_id
                  new_manager = User.query.get(manager_id)
                  if new_manager:
+                     if new_manager.organization_id != org.id:
+                         moved_orgs, moved_days = [new_manager.organization_id, org.id], user_activity_days(new_manager)
                      new_manager.organization = org # Auto-join
                      if new_manager.role != 'admin':
                          new_manager.role = 'manager'
@@ -457,6 +511,7 @@ def edit_organization(org_id):
                  org.manager_id = None
         
         db.session.commit()
+        refresh_org_days(moved_orgs, moved_days)
         return redirect(url_for('organizations'))
     return render_template('edit_organization.html', org=org, users=all_users, user=current_user)
 
@@ -517,14 +572,18 @@ def edit_user(user_id):
         if new_password:
              user_to_edit.password_hash = bcrypt.generate_password_hash(new_password).decode('utf-8')
 
-        org_id = request.form.get('organization_id')
-        user_to_edit.organization_id = org_id if org_id else None
+        org_id = request.form.get('organization_id') or None
+        moved_orgs, moved_days = [], set()
+        if org_id != user_to_edit.organization_id:
+            moved_orgs, moved_days = [user_to_edit.organization_id, org_id], user_activity_days(user_to_edit)
+        user_to_edit.organization_id = org_id
         
         role = request.form.get('role')
         if role:
             user_to_edit.role = role
         
         db.session.commit()
+        refresh_org_days(moved_orgs, moved_days)
         return redirect(url_for('users'))
     return render_template('edit_user.html', user=user_to_edit, organizations=all_orgs, current_user=current_user)
 
@@ -536,8 +595,10 @@ def delete_user(user_id):
         flash("Cannot delete yourself!", "error")
         return redirect(url_for('users'))
         
+    old_org_id, old_days = user_to_delete.organization_id, user_activity_days(user_to_delete)
     db.session.delete(user_to_delete)
     db.session.commit()
+    refresh_org_days([old_org_id], old_days)
     return redirect(url_for('users'))
 
 
@@ -557,23 +618,34 @@ def analyze_feedback():
         return "Access Forbidden", 403
 
     feedbacks = Feedback.query.filter_by(sentiment='unknown').all()
-    count = 0
+    changed = []
     for fb in feedbacks:
         # Re-analyze
         new_sentiment = analyzer.analyze(fb.comment)
         if fb.sentiment != new_sentiment:
             fb.sentiment = new_sentiment
-            count += 1
+            changed.append(fb)
+    count = len(changed)
     
     if count > 0:
         db.session.commit()
+        # Sentiment mix of past days changed; update those rollup rows only
+        refresh_feedback_days(changed)
         flash(f"Analyzed and updated {count} feedback entries.", "success")
     else:
         flash("Sentiment analysis up to date.", "info")
 
     return redirect(url_for('feedback'))
 
+@app.cli.command('rollup-org-stats')
+def rollup_org_stats():
+    """Backfills/refreshes the per-organization daily rollup (flask --app app rollup-org-stats)."""
+    for org in Organization.query.all():
+        refresh_org_rollups(org.id)
+    print("Organization rollups up to date.")
+
 if __name__ == '__main__':
+    # Development only. For production use serve.py (gunicorn, pre-forked workers).
     # No more drop_all() !
     app.run(debug=True, port=8081, host='0.0.0.0')
 
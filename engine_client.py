@@ -0,0 +1,186 @@
+import threading
+import time
+import requests
+
+# Breaker states
+CLOSED = 'closed'        # Engine healthy, requests go through
+OPEN = 'open'            # Engine failing, requests fail fast without touching the network
+HALF_OPEN = 'half_open'  # Recovery window elapsed, a single probe request is let through
+
+# (connect, read) timeouts in seconds so a dead Engine can't hold a worker until the OS TCP timeout
+DEFAULT_TIMEOUT = (3, 10)
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIMEOUT = 30
+
+# Per-endpoint overrides. Course generation runs the LLM and isn't idempotent: a read
+# timeout would report failure (and trip the breaker) while the Engine still saves the
+# course, so it only gets a connect timeout.
+ENDPOINT_SETTINGS = {
+    'login': {'failure_threshold': 3, 'recovery_timeout': 15},
+    'generate_course': {'failure_threshold': 3, 'recovery_timeout': 60, 'timeout': (3, None)},
+}
+
+
+class EngineUnavailable(requests.RequestException):
+    """Raised without contacting the Engine when the endpoint's breaker is open."""
+
+
+class CircuitBreaker:
+    """Per-endpoint breaker.
+
+    allow_request() hands out the current generation as a token and every state
+    change starts a new generation. Outcomes reported with an older token are
+    ignored, so a slow request admitted while CLOSED can't close or reopen the
+    breaker after it has moved on, and only the half-open probe decides the
+    HALF_OPEN -> CLOSED/OPEN transition.
+    """
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD, recovery_timeout=DEFAULT_RECOVERY_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.generation = 0
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.total_failures = 0
+        self.total_rejected = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Returns a token if a request may go to the Engine, or None to fail fast.
+
+        Moves OPEN -> HALF_OPEN once the recovery timeout has passed.
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self._set_state(HALF_OPEN)
+
+            if self.state == CLOSED:
+                return self.generation
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return self.generation
+
+            self.total_rejected += 1
+            return None
+
+    def record_success(self, token):
+        with self._lock:
+            if token != self.generation:
+                return
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self._set_state(CLOSED)
+
+    def record_failure(self, token):
+        with self._lock:
+            self.total_failures += 1
+            if token != self.generation:
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0, round(self.recovery_timeout - (time.monotonic() - self.opened_at), 1))
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'failure_threshold': self.failure_threshold,
+                'recovery_timeout': self.recovery_timeout,
+                'retry_in': retry_in,
+                'total_failures': self.total_failures,
+                'total_rejected': self.total_rejected,
+            }
+
+    def _set_state(self, state):
+        if state != self.state:
+            print(f"Engine circuit '{self.name}': {self.state} -> {state}")
+            self.state = state
+            self.generation += 1
+            self.failures = 0
+            self.probe_in_flight = False
+
+
+class EngineClient:
+    """Thin wrapper around `requests` that routes every Engine call through a per-endpoint breaker.
+
+    Breakers live in process memory, so each gunicorn worker trips independently
+    and status() describes only the current worker.
+    """
+
+    def __init__(self, base_url, endpoint_settings=None):
+        self.base_url = base_url
+        self.endpoint_settings = ENDPOINT_SETTINGS if endpoint_settings is None else endpoint_settings
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint):
+        with self._lock:
+            if endpoint not in self.breakers:
+                settings = self.endpoint_settings.get(endpoint, {})
+                self.breakers[endpoint] = CircuitBreaker(
+                    endpoint,
+                    failure_threshold=settings.get('failure_threshold', DEFAULT_FAILURE_THRESHOLD),
+                    recovery_timeout=settings.get('recovery_timeout', DEFAULT_RECOVERY_TIMEOUT),
+                )
+            return self.breakers[endpoint]
+
+    def request(self, endpoint, method, path, **kwargs):
+        """Sends `method path` to the Engine, failing fast with EngineUnavailable if the breaker is open.
+
+        Connection errors, timeouts and 5xx responses count as failures; anything else
+        (including 4xx, which means the Engine is up) counts as a success.
+        """
+        breaker = self.breaker(endpoint)
+        token = breaker.allow_request()
+        if token is None:
+            raise EngineUnavailable(f"Engine endpoint '{endpoint}' is unavailable (circuit open)")
+
+        kwargs.setdefault('timeout', self.endpoint_settings.get(endpoint, {}).get('timeout', DEFAULT_TIMEOUT))
+        try:
+            resp = requests.request(method, self.base_url + path, **kwargs)
+        except Exception:
+            # Any error must be reported, or a half-open probe would stay in flight forever
+            breaker.record_failure(token)
+            raise
+
+        if resp.status_code >= 500:
+            breaker.record_failure(token)
+        else:
+            breaker.record_success(token)
+        return resp
+
+    def get(self, endpoint, path, **kwargs):
+        return self.request(endpoint, 'GET', path, **kwargs)
+
+    def post(self, endpoint, path, **kwargs):
+        return self.request(endpoint, 'POST', path, **kwargs)
+
+    def delete(self, endpoint, path, **kwargs):
+        return self.request(endpoint, 'DELETE', path, **kwargs)
+
+    def status(self):
+        """Returns {endpoint: breaker snapshot} for every endpoint called so far."""
+        with self._lock:
+            breakers = list(self.breakers.values())
+        return {b.name: b.snapshot() for b in breakers}
+
+    def overall_state(self):
+        """OPEN if any endpoint is open, HALF_OPEN if any is probing, else CLOSED."""
+        states = {s['state'] for s in self.status().values()}
+        if OPEN in states:
+            return OPEN
+        if HALF_OPEN in states:
+            return HALF_OPEN
+        return CLOSED
+
+    def reset(self):
+        with self._lock:
+            self.breakers = {}
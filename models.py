@@ -80,3 +80,20 @@ class CourseMetadata(db.Model):
     owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True) # For user courses
     organization_id = db.Column(db.String(36), db.ForeignKey('organizations.id'), nullable=True) # For org courses
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# --- Dashboard-owned tables (not part of AmbaLearn-Engine) ---
+
+class OrgDailyStat(db.Model):
+    """Per-organization daily rollup, maintained by analytics.py."""
+    __tablename__ = 'org_daily_stats'
+    organization_id = db.Column(db.String(36), db.ForeignKey('organizations.id', ondelete='CASCADE'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    new_members = db.Column(db.Integer, nullable=False, default=0)
+    courses_created = db.Column(db.Integer, nullable=False, default=0)
+    feedback_count = db.Column(db.Integer, nullable=False, default=0)
+    feedback_good = db.Column(db.Integer, nullable=False, default=0)
+    feedback_bad = db.Column(db.Integer, nullable=False, default=0)
+    feedback_neutral = db.Column(db.Integer, nullable=False, default=0)
+    exam_count = db.Column(db.Integer, nullable=False, default=0)
+    exam_score_sum = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
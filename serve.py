@@ -0,0 +1,131 @@
+"""Production server for the AmbaLearn Dashboard.
+
+`python app.py` starts Flask's single-process development server with the
+debugger enabled. It is only meant for local work. This module runs the same
+app under gunicorn instead:
+
+    python serve.py --bind 0.0.0.0:8081 --workers 4 --threads 4
+
+The app is imported once in the gunicorn master before any worker is forked
+(`preload_app`). Everything created at import time is then shared
+copy-on-write by the workers instead of being rebuilt in each one:
+
+* the trained Naive Bayes sentiment model (`sentiment.analyzer`). Importing
+  the app only extracts features from feedback_dataset.csv; textblob trains
+  the NLTK classifier lazily on first use, so `warm_sentiment_model` runs one
+  classification in the master. Without it every worker would train its own
+  copy on its first `analyze_feedback` request,
+* the compiled Jinja templates (see `warm_templates`),
+* `SECRET_KEY`, which is random per process. Without preloading, each worker
+  would sign session cookies with its own key and users would be logged out
+  whenever a request landed on a different worker.
+
+Process management:
+
+* `kill -HUP <master pid>` reloads gracefully. New workers are started and
+  the old ones finish their in-flight requests before exiting. Because the
+  app is preloaded, new workers fork from the master's copy, so code changes
+  need a full restart (or `kill -USR2` to start a new master).
+* `--max-requests` (with `--max-requests-jitter`) recycles each worker after
+  it has served that many requests, which bounds slow memory growth.
+* `kill -TERM <master pid>` shuts down gracefully, waiting up to
+  `--graceful-timeout` seconds for in-flight requests.
+
+Throughput compared with the dev server: `app.run()` is threaded (the
+default since Flask 1.0), so it does serve requests concurrently, but all of
+them share one process and one GIL, and the Werkzeug debugger and reloader
+add per-request overhead. Pages that wait on the Engine or MySQL overlap fine
+there. CPU-bound work (template rendering, sentiment analysis) is serialised
+on the GIL, and one crash or memory leak takes the whole server with it.
+Under gunicorn, CPU-bound work scales with `--workers` (one GIL each),
+I/O-bound waiting scales with `workers * threads`, and workers are recycled
+and restarted independently.
+
+No benchmark numbers are recorded here: the dashboard needs the shared MySQL
+database and a running Engine, so figures only mean something against a real
+deployment. To compare, run the same load against both servers, e.g.
+`ab -n 2000 -c 50 http://host:8081/login` with `python app.py` and then with
+`python serve.py`, and note the requests/second and latency percentiles.
+"""
+import argparse
+import multiprocessing
+import os
+
+from gunicorn.app.base import BaseApplication
+
+from app import app
+from models import db
+from sentiment import analyzer
+
+
+def warm_templates(flask_app):
+    """Compiles every template up front so workers inherit the cached code."""
+    env = flask_app.jinja_env
+    for name in env.list_templates():
+        env.get_template(name)
+
+
+def warm_sentiment_model():
+    """Trains the classifier now (textblob defers it to the first classify call)."""
+    analyzer.analyze("warm up")
+
+
+def post_fork(server, worker):
+    """Forgets DB connections inherited from the master without closing them.
+
+    close=False leaves the sockets to the master (the pattern SQLAlchemy documents
+    for forked children); the worker's pool then opens its own connections.
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+class DashboardApplication(BaseApplication):
+    def __init__(self, flask_app, options=None):
+        self.application = flask_app
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key.lower(), value)
+
+    def load(self):
+        return self.application
+
+
+def parse_args():
+    default_workers = multiprocessing.cpu_count() * 2 + 1
+    parser = argparse.ArgumentParser(description="Run the AmbaLearn Dashboard with gunicorn.")
+    parser.add_argument("--bind", default=os.environ.get("DASH_BIND", "0.0.0.0:8081"))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("DASH_WORKERS", default_workers)))
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("DASH_THREADS", 4)))
+    parser.add_argument("--timeout", type=int, default=int(os.environ.get("DASH_TIMEOUT", 60)))
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.environ.get("DASH_GRACEFUL_TIMEOUT", 30)))
+    parser.add_argument("--max-requests", type=int, default=int(os.environ.get("DASH_MAX_REQUESTS", 1000)))
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.environ.get("DASH_MAX_REQUESTS_JITTER", 100)))
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    warm_templates(app)
+    warm_sentiment_model()
+
+    options = {
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        # gthread serves `threads` requests per worker concurrently
+        "worker_class": "gthread",
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests_jitter,
+        # Load app, templates and the trained sentiment model in the master, then fork
+        "preload_app": True,
+        "post_fork": post_fork,
+        "accesslog": "-",
+    }
+    DashboardApplication(app, options).run()
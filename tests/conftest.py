@@ -0,0 +1,44 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubEngineHandler(BaseHTTPRequestHandler):
+    """Answers every request with the server's current `status` after `delay` seconds."""
+
+    def _respond(self):
+        self.server.hits += 1
+        time.sleep(self.server.delay)
+        body = b'{}'
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_DELETE = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_engine():
+    """A local stand-in for AmbaLearn-Engine. Set `.status` / `.delay` to script its behaviour."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubEngineHandler)
+    server.daemon_threads = True
+    server.status = 200
+    server.delay = 0
+    server.hits = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,179 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+import analytics
+from models import db, User, Organization, Feedback, ExamScore, CourseMetadata, OrgDailyStat
+
+NOON = datetime(2026, 3, 15, 12, 0)
+
+
+class Clock:
+    now = NOON
+
+
+class FakeDatetime(datetime):
+    @classmethod
+    def utcnow(cls):
+        return Clock.now
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(analytics, 'datetime', FakeDatetime)
+    Clock.now = NOON
+
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(flask_app)
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+def days_ago(n, hour=10):
+    return datetime.combine(NOON.date() - timedelta(days=n), datetime.min.time()) + timedelta(hours=hour)
+
+
+def add_org(name):
+    org = Organization(name=name, invitation_code=name[:6])
+    db.session.add(org)
+    db.session.commit()
+    return org
+
+
+def add_user(org, registered_at, name='member'):
+    user = User(username=name, email=f"{name}@example.com", organization_id=org.id if org else None,
+                registered_at=registered_at)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def add_course(org, created_at, uid):
+    db.session.add(CourseMetadata(uid=uid, title=uid, organization_id=org.id, created_at=created_at))
+    db.session.commit()
+
+
+def row(org, day):
+    return db.session.get(OrgDailyStat, (org.id, day))
+
+
+def test_first_refresh_backfills_window(app):
+    org = add_org('alpha')
+    add_user(org, days_ago(10))
+    add_course(org, days_ago(3), 'c1')
+
+    analytics.refresh_org_rollups(org.id)
+
+    assert OrgDailyStat.query.filter_by(organization_id=org.id).count() == analytics.ROLLUP_WINDOW_DAYS
+    assert row(org, days_ago(10).date()).new_members == 1
+    assert row(org, days_ago(3).date()).courses_created == 1
+    assert row(org, NOON.date()).courses_created == 0
+
+
+def test_within_ttl_nothing_and_after_ttl_only_today_is_rerolled(app):
+    org = add_org('alpha')
+    analytics.refresh_org_rollups(org.id)
+    add_course(org, days_ago(5), 'old')
+    add_course(org, days_ago(0, hour=11), 'today')
+
+    Clock.now = NOON + timedelta(minutes=1)
+    analytics.refresh_org_rollups(org.id)
+    assert row(org, NOON.date()).courses_created == 0
+
+    Clock.now = NOON + analytics.ROLLUP_TTL + timedelta(minutes=1)
+    analytics.refresh_org_rollups(org.id)
+    assert row(org, NOON.date()).courses_created == 1
+    # Closed days are not re-read by the periodic refresh
+    assert row(org, days_ago(5).date()).courses_created == 0
+
+
+def test_new_day_rerolls_yesterday(app):
+    org = add_org('alpha')
+    analytics.refresh_org_rollups(org.id)
+    add_course(org, days_ago(0, hour=18), 'evening')
+
+    Clock.now = datetime.combine(NOON.date() + timedelta(days=1), datetime.min.time()) + timedelta(minutes=10)
+    analytics.refresh_org_rollups(org.id)
+
+    assert row(org, NOON.date()).courses_created == 1
+    assert row(org, NOON.date() + timedelta(days=1)) is not None
+
+
+def test_gap_in_the_middle_is_filled(app):
+    org = add_org('alpha')
+    analytics.refresh_org_rollups(org.id)
+    OrgDailyStat.query.filter(
+        OrgDailyStat.organization_id == org.id,
+        OrgDailyStat.date.in_([days_ago(n).date() for n in (8, 9, 10)])
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    add_course(org, days_ago(9), 'gap')
+
+    Clock.now = NOON + timedelta(minutes=1)
+    analytics.refresh_org_rollups(org.id)
+
+    assert OrgDailyStat.query.filter_by(organization_id=org.id).count() == analytics.ROLLUP_WINDOW_DAYS
+    assert row(org, days_ago(9).date()).courses_created == 1
+
+
+def test_moving_a_user_rerolls_both_organizations(app):
+    old_org, new_org = add_org('alpha'), add_org('bravo')
+    user = add_user(old_org, days_ago(6))
+    db.session.add(ExamScore(user_id=user.id, exam_id='e1', exam_title='Exam', score=80, exam_date=days_ago(4)))
+    db.session.commit()
+    analytics.refresh_org_rollups(old_org.id)
+    analytics.refresh_org_rollups(new_org.id)
+
+    days = analytics.user_activity_days(user)
+    user.organization_id = new_org.id
+    db.session.commit()
+    analytics.refresh_org_days([old_org.id, new_org.id], days)
+
+    assert days == {days_ago(6).date(), days_ago(4).date()}
+    assert row(old_org, days_ago(6).date()).new_members == 0
+    assert row(old_org, days_ago(4).date()).exam_count == 0
+    assert row(new_org, days_ago(6).date()).new_members == 1
+    assert row(new_org, days_ago(4).date()).exam_count == 1
+    assert row(new_org, days_ago(4).date()).exam_score_sum == 80
+
+
+def test_feedback_analysis_only_updates_existing_rows(app):
+    org = add_org('alpha')
+    user = add_user(org, days_ago(40))
+    analytics.refresh_org_rollups(org.id)
+    OrgDailyStat.query.filter_by(organization_id=org.id, date=days_ago(7).date()).delete()
+    db.session.commit()
+
+    feedbacks = []
+    for n in (7, 2):
+        fb = Feedback(user_id=user.id, comment='great', course_id='c1', course_name='Course',
+                      sentiment='Good', created_at=days_ago(n))
+        db.session.add(fb)
+        feedbacks.append(fb)
+    db.session.commit()
+
+    analytics.refresh_feedback_days(feedbacks)
+
+    assert row(org, days_ago(7).date()) is None
+    assert row(org, days_ago(2).date()).feedback_good == 1
+    assert row(org, days_ago(2).date()).feedback_count == 1
+
+
+def test_timeseries_average_exam_score(app):
+    org = add_org('alpha')
+    user = add_user(org, days_ago(40))
+    for score in (70, 90):
+        db.session.add(ExamScore(user_id=user.id, exam_id='e', exam_title='Exam', score=score, exam_date=days_ago(1)))
+    db.session.commit()
+    analytics.refresh_org_rollups(org.id)
+
+    stats = analytics.org_timeseries(org.id)
+
+    assert stats['exam_counts'][-2] == 2
+    assert stats['exam_avg_scores'][-2] == 80
+    assert stats['exam_avg_scores'][-1] is None
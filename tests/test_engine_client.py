@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from engine_client import CircuitBreaker, EngineClient, EngineUnavailable, CLOSED, OPEN, HALF_OPEN
+
+SETTINGS = {'courses': {'failure_threshold': 2, 'recovery_timeout': 0.2, 'timeout': (1, 2)}}
+
+
+def make_client(stub_engine):
+    return EngineClient(stub_engine.url, endpoint_settings=SETTINGS)
+
+
+def trip(client, stub_engine):
+    stub_engine.status = 500
+    for _ in range(2):
+        client.get('courses', '/courses')
+    assert client.breaker('courses').state == OPEN
+
+
+def test_5xx_opens_breaker_and_then_fails_fast(stub_engine):
+    client = make_client(stub_engine)
+    trip(client, stub_engine)
+    hits = stub_engine.hits
+
+    with pytest.raises(EngineUnavailable):
+        client.get('courses', '/courses')
+    assert stub_engine.hits == hits
+    assert client.status()['courses']['total_rejected'] == 1
+
+
+def test_4xx_counts_as_success(stub_engine):
+    client = make_client(stub_engine)
+    stub_engine.status = 404
+    for _ in range(5):
+        assert client.get('courses', '/courses').status_code == 404
+    assert client.breaker('courses').state == CLOSED
+
+
+def test_connection_errors_count_as_failures(stub_engine):
+    client = make_client(stub_engine)
+    stub_engine.shutdown()
+    stub_engine.server_close()
+    for _ in range(2):
+        with pytest.raises(requests.RequestException):
+            client.get('courses', '/courses')
+    assert client.breaker('courses').state == OPEN
+
+
+def test_endpoints_trip_independently(stub_engine):
+    client = make_client(stub_engine)
+    trip(client, stub_engine)
+    stub_engine.status = 200
+    assert client.get('login', '/login').status_code == 200
+    assert client.overall_state() == OPEN
+
+
+def test_half_open_probe_success_closes(stub_engine):
+    client = make_client(stub_engine)
+    trip(client, stub_engine)
+    time.sleep(0.25)
+    stub_engine.status = 200
+
+    assert client.get('courses', '/courses').status_code == 200
+    assert client.breaker('courses').state == CLOSED
+
+
+def test_half_open_probe_failure_reopens(stub_engine):
+    client = make_client(stub_engine)
+    trip(client, stub_engine)
+    time.sleep(0.25)
+
+    client.get('courses', '/courses')
+    assert client.breaker('courses').state == OPEN
+    with pytest.raises(EngineUnavailable):
+        client.get('courses', '/courses')
+
+
+def test_half_open_admits_a_single_probe(stub_engine):
+    client = make_client(stub_engine)
+    trip(client, stub_engine)
+    time.sleep(0.25)
+    stub_engine.status = 200
+    stub_engine.delay = 0.3
+
+    probe = threading.Thread(target=client.get, args=('courses', '/courses'))
+    probe.start()
+    time.sleep(0.1)
+    assert client.breaker('courses').state == HALF_OPEN
+    with pytest.raises(EngineUnavailable):
+        client.get('courses', '/courses')
+    probe.join()
+
+    assert client.breaker('courses').state == CLOSED
+
+
+def test_stale_success_does_not_close_open_breaker():
+    breaker = CircuitBreaker('courses', failure_threshold=1, recovery_timeout=60)
+    slow = breaker.allow_request()
+    breaker.record_failure(breaker.allow_request())
+    assert breaker.state == OPEN
+
+    breaker.record_success(slow)
+    assert breaker.state == OPEN
+
+
+def test_stale_failure_does_not_release_probe():
+    breaker = CircuitBreaker('courses', failure_threshold=1, recovery_timeout=0)
+    slow = breaker.allow_request()
+    breaker.record_failure(breaker.allow_request())
+    probe = breaker.allow_request()
+    assert breaker.state == HALF_OPEN and probe is not None
+
+    breaker.record_failure(slow)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request() is None
+
+    breaker.record_success(probe)
+    assert breaker.state == CLOSED